@@ -5,27 +5,172 @@ Instant rider detection: Frame-by-frame, zero delay
 """
 
 import cv2
+import http.client
 import numpy as np
+import os
+import platform
+import queue
+import sys
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from pathlib import Path
 import urllib.request
 import zipfile
 
+try:
+    from numba import njit, prange
+except ImportError:  # numba is optional; NumPy broadcasting is used instead
+    njit = None
+    prange = range
+
+try:
+    from tqdm import tqdm
+except ImportError:  # tqdm is optional; downloads just run without a progress bar
+    tqdm = None
+
+
+def _iou_scalar(x1a, y1a, x2a, y2a, x1b, y1b, x2b, y2b):
+    """IoU of two boxes given as plain scalars (no tuple unpacking when JIT'd)"""
+    x_inter_min = max(x1a, x1b)
+    x_inter_max = min(x2a, x2b)
+    y_inter_min = max(y1a, y1b)
+    y_inter_max = min(y2a, y2b)
+    
+    if x_inter_max < x_inter_min or y_inter_max < y_inter_min:
+        return 0.0
+    
+    intersection = (x_inter_max - x_inter_min) * (y_inter_max - y_inter_min)
+    union = (x2a - x1a) * (y2a - y1a) + (x2b - x1b) * (y2b - y1b) - intersection
+    
+    return intersection / union if union > 0 else 0.0
+
+
+def _pairwise_iou(bikes, persons):
+    """(B,4) x (P,4) boxes -> (B,P) IoU matrix"""
+    out = np.zeros((bikes.shape[0], persons.shape[0]), dtype=np.float32)
+    for i in prange(bikes.shape[0]):
+        for j in range(persons.shape[0]):
+            out[i, j] = _iou_scalar(
+                bikes[i, 0], bikes[i, 1], bikes[i, 2], bikes[i, 3],
+                persons[j, 0], persons[j, 1], persons[j, 2], persons[j, 3]
+            )
+    return out
+
+
+def _pairwise_dist2(centers):
+    """(P,2) centers -> (P,P) squared Euclidean distances"""
+    n = centers.shape[0]
+    out = np.empty((n, n), dtype=np.float32)
+    for i in prange(n):
+        for j in range(n):
+            dx = centers[i, 0] - centers[j, 0]
+            dy = centers[i, 1] - centers[j, 1]
+            out[i, j] = dx * dx + dy * dy
+    return out
+
+
+if njit is not None:
+    # cache=True persists the compiled kernels to disk across runs
+    _iou_scalar = njit(cache=True, fastmath=True)(_iou_scalar)
+    _pairwise_iou = njit(cache=True, parallel=True, fastmath=True)(_pairwise_iou)
+    _pairwise_dist2 = njit(cache=True, parallel=True, fastmath=True)(_pairwise_dist2)
+
+
+# COCO class ids of the detected classes
+CLASS_PERSON = 0
+CLASS_BICYCLE = 1
+CLASS_MOTORCYCLE = 3
+
+
+@dataclass
+class Detections:
+    """
+    Detections for one frame as parallel arrays (row i = detection i)
+    
+    Rider detections are the bike's row repeated with rider_mask set; the
+    person riding it is no longer listed on its own.
+    """
+    bboxes: np.ndarray       # (N,4) int32 x1, y1, x2, y2
+    classes: np.ndarray      # (N,) uint8 COCO class id
+    confs: np.ndarray        # (N,) float32
+    size_ratios: np.ndarray  # (N,) float32, % of frame area (distance estimation)
+    rider_mask: np.ndarray   # (N,) bool
+    
+    @classmethod
+    def empty(cls):
+        return cls(
+            np.empty((0, 4), dtype=np.int32),
+            np.empty(0, dtype=np.uint8),
+            np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=np.float32),
+            np.empty(0, dtype=bool)
+        )
+    
+    @classmethod
+    def concat(cls, parts):
+        return cls(
+            np.concatenate([p.bboxes for p in parts]),
+            np.concatenate([p.classes for p in parts]),
+            np.concatenate([p.confs for p in parts]),
+            np.concatenate([p.size_ratios for p in parts]),
+            np.concatenate([p.rider_mask for p in parts])
+        )
+    
+    def __len__(self):
+        return len(self.classes)
+    
+    def __getitem__(self, index):
+        """Subset by boolean mask or index array"""
+        return Detections(
+            self.bboxes[index],
+            self.classes[index],
+            self.confs[index],
+            self.size_ratios[index],
+            self.rider_mask[index]
+        )
+
+
 class YOLOv3Detector:
     """
     YOLOv3-tiny object detector using OpenCV DNN module
     No torch/tensorflow/ONNX required - pure OpenCV
     """
     
-    def __init__(self, confidence_threshold=0.2, long_distance_mode=True):
+    # On-frame label text per detection class and distance indicator
+    LABEL_PREFIXES = {
+        'Person on Bike': 'BIKE (RIDER)',
+        'bicycle': 'BICYCLE',
+        'motorcycle': 'BIKE (MOTO)',
+        'person': 'Person'
+    }
+    # Distance indicator dot colors (BGR); Hershey fonts can't render emoji
+    DISTANCE_COLORS = {'near': (0, 0, 255), 'medium': (0, 255, 255), 'far': (0, 255, 0)}
+    
+    WEIGHTS_URL = "https://pjreddie.com/media/files/yolov3-tiny.weights"
+    CONFIG_URL = "https://raw.githubusercontent.com/pjreddie/darknet/master/cfg/yolov3-tiny.cfg"
+    
+    def __init__(self, confidence_threshold=0.2, long_distance_mode=True, batch_size=4, detect_interval=3,
+                 input_size=320):
         """Initialize YOLOv3-tiny with OpenCV DNN
         
         Args:
             confidence_threshold: Lower threshold for detection (default 0.2 for long-distance)
             long_distance_mode: Enable long-distance detection optimization
+            batch_size: Max frames per forward pass when frames are queued up
+            detect_interval: Full DNN pass every N frames, tracked in between
+            input_size: Network input side (320 is ~0.6x the cost of 416)
         """
         self.confidence_threshold = confidence_threshold
         self.long_distance_mode = long_distance_mode
+        self.batch_size = batch_size
+        self.input_size = input_size
+        
+        # Long-distance mode re-runs a zoomed window around tiny detections
+        # (size ratio below zoom_ratio %) at zoom_size for extra detail
+        self.zoom_size = 416
+        self.zoom_ratio = 0.3
         
         # Download YOLOv3-tiny weights if not present
         self.model_path, self.config_path = self._setup_model()
@@ -34,8 +179,15 @@ class YOLOv3Detector:
         
         # Load network
         self.net = cv2.dnn.readNetFromDarknet(self.config_path, self.model_path)
-        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
-        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        backend, target = self._select_dnn_target()
+        
+        # The zoom pass gets its own net: switching one net between input
+        # shapes makes OpenCV DNN reallocate its layer buffers every time
+        self.zoom_net = None
+        if self.long_distance_mode and self.input_size < self.zoom_size:
+            self.zoom_net = cv2.dnn.readNetFromDarknet(self.config_path, self.model_path)
+            self.zoom_net.setPreferableBackend(backend)
+            self.zoom_net.setPreferableTarget(target)
         
         # Enable NMS (Non-Maximum Suppression) for better small object detection
         if self.long_distance_mode:
@@ -53,7 +205,9 @@ class YOLOv3Detector:
         ]
         
         # person=0, bicycle=1, motorcycle=3
-        self.target_classes = {'person': 0, 'bicycle': 1, 'motorcycle': 3}
+        self.target_classes = {'person': CLASS_PERSON, 'bicycle': CLASS_BICYCLE, 'motorcycle': CLASS_MOTORCYCLE}
+        # Same ids as an array for vectorized masking in the decode step
+        self._target_class_ids = np.array(sorted(self.target_classes.values()), dtype=np.int32)
         self.class_colors = {
             'person': (255, 0, 0),      # Blue
             'bicycle': (0, 255, 0),     # Green
@@ -61,10 +215,104 @@ class YOLOv3Detector:
             'rider': (0, 0, 255)        # Red
         }
         
+        # Label sizes for every prefix. Confidence is always "d.dd" and
+        # Hershey digits share one advance width, so the size of
+        # "<prefix> 0.00" is exact for any confidence value.
+        self._text_sizes = {
+            name: cv2.getTextSize(f"{name} 0.00", cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+            for name in self.LABEL_PREFIXES.values()
+        }
+        
+        # Reusable preprocessing buffers for single-frame inference
+        size = self.input_size
+        self._resized = np.empty((size, size, 3), dtype=np.uint8)
+        self._rgb = np.empty((size, size, 3), dtype=np.uint8)
+        self._blob = np.empty((1, 3, size, size), dtype=np.float32)
+        
+        # Motion gating: skip the forward pass when the scene hasn't changed
+        # (mean abs diff of a 160x120 grayscale thumbnail) and the cached
+        # detections are still fresh
+        self.motion_threshold = 2.0
+        self.max_reuse_age = 0.5  # seconds
+        self._prev_gray = None
+        self._last_detections = None
+        self._last_detection_time = 0.0
+        
+        # Tracking between detections: full DNN pass every `detect_interval`
+        # frames, MOSSE trackers (~1 ms/target) move the boxes in between
+        self.detect_interval = detect_interval
+        if self.detect_interval > 1 and not hasattr(cv2, 'legacy'):
+            print("[!] cv2.legacy not available (pip install opencv-contrib-python), tracking disabled")
+            self.detect_interval = 1
+        self._trackers = None
+        self._tracked_detections = Detections.empty()
+        self._static_detections = Detections.empty()
+        self._frames_since_detection = 0
+        
         print("[✓] YOLOv3-tiny Model loaded successfully")
     
-    @staticmethod
-    def _setup_model():
+    def _select_dnn_target(self):
+        """
+        Pick the fastest available OpenCV DNN backend/target
+        
+        Order:
+        - CUDA FP16 (needs an OpenCV build with CUDA, e.g. compiled from
+          source with WITH_CUDA=ON - the pip opencv-python wheels are CPU-only)
+        - OpenCL FP16 (integrated GPUs)
+        - OpenVINO on CPU (OpenCV built with OpenVINO, e.g. the OpenVINO
+          toolkit's OpenCV); runs the same Darknet network through Intel's
+          kernels, so the output layout is unchanged
+        - CPU FP16 (OpenCV >= 4.8, ARMv8 CPUs)
+        - CPU
+        Each candidate is verified with a dummy forward pass, since a wrong
+        OpenCV build only fails once the network runs.
+        
+        Returns: (backend, target) that was selected
+        """
+        candidates = []
+        
+        try:
+            if cv2.cuda.getCudaEnabledDeviceCount() > 0:
+                candidates.append(('CUDA (FP16)', cv2.dnn.DNN_BACKEND_CUDA, cv2.dnn.DNN_TARGET_CUDA_FP16))
+        except Exception:
+            pass  # OpenCV built without CUDA support
+        
+        try:
+            if cv2.ocl.haveOpenCL():
+                cv2.ocl.setUseOpenCL(True)
+                candidates.append(('OpenCL (FP16)', cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_OPENCL_FP16))
+        except Exception:
+            pass  # OpenCL not usable on this machine
+        
+        try:
+            backend = cv2.dnn.DNN_BACKEND_INFERENCE_ENGINE
+            if cv2.dnn.DNN_TARGET_CPU in cv2.dnn.getAvailableTargets(backend):
+                candidates.append(('OpenVINO (CPU)', backend, cv2.dnn.DNN_TARGET_CPU))
+        except Exception:
+            pass  # OpenCV built without OpenVINO support
+        
+        # OpenCV only implements FP16 CPU kernels for ARMv8
+        if hasattr(cv2.dnn, 'DNN_TARGET_CPU_FP16') and platform.machine().lower() in ('arm64', 'aarch64'):
+            candidates.append(('CPU (FP16)', cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU_FP16))
+        
+        for name, backend, target in candidates:
+            try:
+                self.net.setPreferableBackend(backend)
+                self.net.setPreferableTarget(target)
+                self.net.setInput(np.zeros((1, 3, self.input_size, self.input_size), dtype=np.float32))
+                self.net.forward(self.net.getUnconnectedOutLayersNames())
+                print(f"[✓] DNN target: {name}")
+                return backend, target
+            except Exception as e:
+                print(f"[!] DNN target {name} unavailable: {e}")
+        
+        self.net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+        self.net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        print("[✓] DNN target: CPU")
+        return cv2.dnn.DNN_BACKEND_OPENCV, cv2.dnn.DNN_TARGET_CPU
+    
+    @classmethod
+    def _setup_model(cls):
         """
         Setup YOLOv3-tiny weights and config
         Using YOLOv3-tiny as fallback (simpler, no torch needed)
@@ -75,28 +323,81 @@ class YOLOv3Detector:
         weights_path = model_dir / 'yolov3-tiny.weights'
         config_path = model_dir / 'yolov3-tiny.cfg'
         
-        # Download weights if needed
+        # Download missing files in parallel
+        downloads = []
         if not weights_path.exists():
-            print("[*] Downloading YOLOv3-tiny weights (~34MB)...")
-            url_weights = "https://pjreddie.com/media/files/yolov3-tiny.weights"
-            try:
-                urllib.request.urlretrieve(url_weights, weights_path)
-                print("[✓] Weights downloaded")
-            except Exception as e:
-                print(f"[!] Warning: Could not download weights: {e}")
-        
-        # Download config if needed
+            downloads.append(("weights (~34MB)", cls.WEIGHTS_URL, weights_path))
         if not config_path.exists():
-            print("[*] Downloading YOLOv3-tiny config...")
-            url_config = "https://raw.githubusercontent.com/pjreddie/darknet/master/cfg/yolov3-tiny.cfg"
-            try:
-                urllib.request.urlretrieve(url_config, config_path)
-                print("[✓] Config downloaded")
-            except Exception as e:
-                print(f"[!] Warning: Could not download config: {e}")
+            downloads.append(("config", cls.CONFIG_URL, config_path))
+        
+        if downloads:
+            print(f"[*] Downloading YOLOv3-tiny {' + '.join(d[0] for d in downloads)}...")
+            with ThreadPoolExecutor(max_workers=2) as pool:
+                futures = [
+                    (name, path, pool.submit(cls._download, url, path, position))
+                    for position, (name, url, path) in enumerate(downloads)
+                ]
+                for name, path, future in futures:
+                    try:
+                        size = future.result()
+                        print(f"[✓] {path.name} downloaded ({size} bytes)")
+                    except Exception as e:
+                        print(f"[!] Warning: Could not download {path.name}: {e}")
         
         return str(weights_path), str(config_path)
     
+    @staticmethod
+    def _download(url, path, position=0, attempts=3):
+        """
+        Stream url to path in 1 MiB chunks
+        
+        Data goes to a .part file that is only renamed to path once it is
+        complete (as many bytes as Content-Length announced), so a failed
+        download never leaves a truncated file for readNetFromDarknet to
+        choke on.
+        
+        Returns: size of the downloaded file in bytes
+        """
+        part_path = path.with_name(path.name + '.part')
+        
+        try:
+            for attempt in range(1, attempts + 1):
+                received = 0
+                progress = None
+                try:
+                    with urllib.request.urlopen(url, timeout=30) as response, open(part_path, 'wb') as f:
+                        total = int(response.headers.get('Content-Length') or 0)
+                        if tqdm is not None:
+                            progress = tqdm(total=total or None, unit='B', unit_scale=True,
+                                            desc=path.name, position=position, leave=False)
+                        while True:
+                            chunk = response.read(1 << 20)
+                            if not chunk:
+                                break
+                            f.write(chunk)
+                            received += len(chunk)
+                            if progress is not None:
+                                progress.update(len(chunk))
+                except (OSError, http.client.HTTPException) as e:
+                    # HTTPException covers truncated reads (IncompleteRead)
+                    print(f"[!] {path.name}: {e} (attempt {attempt}/{attempts})")
+                    continue
+                finally:
+                    if progress is not None:
+                        progress.close()
+                
+                if total and received != total:
+                    print(f"[!] {path.name}: got {received} of {total} bytes (attempt {attempt}/{attempts})")
+                    continue
+                
+                os.replace(part_path, path)
+                return received
+            
+            raise IOError(f"download failed after {attempts} attempts")
+        finally:
+            # Never leave a partial download behind (no-op after the rename)
+            part_path.unlink(missing_ok=True)
+    
     def detect_frame(self, frame):
         """Detect bikes and persons with instant rider detection
         
@@ -107,11 +408,29 @@ class YOLOv3Detector:
         """
         h, w = frame.shape[:2]
         
-        # Prepare blob
-        blob = cv2.dnn.blobFromImage(
-            frame,
+        # Prepare blob in preallocated buffers (same result as blobFromImage
+        # with swapRB=True, crop=False, but no per-frame allocations)
+        cv2.resize(frame, (self.input_size, self.input_size), dst=self._resized)
+        cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+        np.multiply(self._rgb.transpose(2, 0, 1), np.float32(1 / 255.0), out=self._blob[0])
+        
+        self.net.setInput(self._blob)
+        outputs = self.net.forward(self.output_layers)
+        
+        return self._zoom_distant(frame, self._postprocess(outputs, h, w))
+    
+    def detect_batch(self, frames):
+        """Detect in several frames with a single forward pass
+        
+        Batching amortizes per-forward overhead (kernel launches, layer
+        dispatch) when one frame does not saturate the device.
+        
+        Returns: list of per-frame Detections, aligned with frames
+        """
+        blob = cv2.dnn.blobFromImages(
+            frames,
             scalefactor=1/255.0,
-            size=(416, 416),
+            size=(self.input_size, self.input_size),
             mean=(0, 0, 0),
             swapRB=True,
             crop=False
@@ -120,114 +439,288 @@ class YOLOv3Detector:
         self.net.setInput(blob)
         outputs = self.net.forward(self.output_layers)
         
-        # Process detections with adaptive thresholding
-        detections = []
-        persons = []
-        bikes = []
+        # Region layers emit (B, rows, 85) for batches; split along axis 0
+        batch = len(frames)
+        outputs = [output.reshape(batch, -1, output.shape[-1]) for output in outputs]
         
-        for output in outputs:
-            for detection in output:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-                
-                # Adaptive confidence threshold for long-distance objects
-                # Small objects (distant) = lower threshold tolerance
-                if confidence < self.confidence_threshold:
-                    continue
-                
-                # Only person, bicycle, and motorcycle
-                if class_id not in [0, 1, 3]:
-                    continue
-                
-                # Get class name
-                class_name = self.classes[class_id] if class_id < len(self.classes) else 'unknown'
-                
-                # Get coordinates
-                x = int(detection[0] * w)
-                y = int(detection[1] * h)
-                width = int(detection[2] * w)
-                height = int(detection[3] * h)
-                
-                x1 = max(0, x - width // 2)
-                y1 = max(0, y - height // 2)
-                x2 = min(w, x + width // 2)
-                y2 = min(h, y + height // 2)
-                
-                # Calculate object size (for distance estimation)
-                obj_area = (x2 - x1) * (y2 - y1)
-                frame_area = w * h
-                size_ratio = (obj_area / frame_area) * 100  # As percentage
-                
-                # For long-distance mode: be more lenient with small objects
-                if self.long_distance_mode and size_ratio < 1.0:  # Small object (< 1% of frame)
-                    # Reduce threshold for distant objects
-                    adjusted_threshold = self.confidence_threshold * 0.8
-                    if confidence < adjusted_threshold:
-                        continue
-                
-                det = {
-                    'class': class_name,
-                    'confidence': float(confidence),
-                    'bbox': [x1, y1, x2, y2],
-                    'size_ratio': size_ratio  # Track object size for distance estimation
-                }
-                
-                detections.append(det)
-                
-                if class_name == 'person':
-                    persons.append(det)
-                elif class_name == 'bicycle' or class_name == 'motorcycle':
-                    bikes.append(det)  # Treat both bicycles and motorcycles as bikes
+        return [
+            self._zoom_distant(frame, self._postprocess([output[idx] for output in outputs], *frame.shape[:2]))
+            for idx, frame in enumerate(frames)
+        ]
+    
+    def _zoom_distant(self, frame, detections):
+        """
+        Re-detect tiny (distant) objects on a zoomed window at zoom_size
+        
+        The low-res pass keeps typical frames cheap; when it finds anything
+        below zoom_ratio % of the frame, the window around those objects is
+        run again at higher resolution and its detections replace the
+        low-res ones inside the window.
+        """
+        if self.zoom_net is None:
+            return detections
+        
+        distant = detections.size_ratios < self.zoom_ratio
+        if not distant.any():
+            return detections
+        
+        # Window around all distant objects, at least half the frame per side
+        h, w = frame.shape[:2]
+        boxes = detections.bboxes[distant]
+        x1, y1 = boxes[:, :2].min(axis=0).tolist()
+        x2, y2 = boxes[:, 2:].max(axis=0).tolist()
+        roi_w = max(x2 - x1, w // 2)
+        roi_h = max(y2 - y1, h // 2)
+        roi_x = min(max(0, (x1 + x2 - roi_w) // 2), w - roi_w)
+        roi_y = min(max(0, (y1 + y2 - roi_h) // 2), h - roi_h)
+        roi = frame[roi_y:roi_y + roi_h, roi_x:roi_x + roi_w]
+        
+        blob = cv2.dnn.blobFromImage(
+            roi,
+            scalefactor=1/255.0,
+            size=(self.zoom_size, self.zoom_size),
+            mean=(0, 0, 0),
+            swapRB=True,
+            crop=False
+        )
+        self.zoom_net.setInput(blob)
+        outputs = self.zoom_net.forward(self.output_layers)
+        zoomed = self._postprocess(outputs, roi_h, roi_w, offset=(roi_x, roi_y), frame_size=(h, w))
+        
+        # Keep low-res detections centered outside the window
+        centers = (detections.bboxes[:, :2] + detections.bboxes[:, 2:]) // 2
+        inside = (
+            (centers[:, 0] >= roi_x) & (centers[:, 0] < roi_x + roi_w) &
+            (centers[:, 1] >= roi_y) & (centers[:, 1] < roi_y + roi_h)
+        )
+        
+        return Detections.concat([detections[~inside], zoomed])
+    
+    def _should_detect(self, frame):
+        """
+        Decide whether a frame needs a fresh forward pass
+        
+        Downscale + absdiff is ~0.1 ms versus a full DNN pass, so static
+        stretches of traffic footage reuse the cached detections.
+        """
+        small = cv2.resize(frame, (160, 120), interpolation=cv2.INTER_AREA)
+        gray = cv2.cvtColor(small, cv2.COLOR_BGR2GRAY)
+        prev_gray = self._prev_gray
+        self._prev_gray = gray
+        
+        if prev_gray is None or self._last_detections is None:
+            return True
+        if time.time() - self._last_detection_time > self.max_reuse_age:
+            return True
+        
+        return cv2.absdiff(gray, prev_gray).mean() >= self.motion_threshold
+    
+    def _start_tracking(self, frame, detections):
+        """Re-initialize the trackers from a fresh set of detections"""
+        self._trackers = cv2.legacy.MultiTracker_create()
+        self._frames_since_detection = 0
+        
+        # Boxes too small for MOSSE to lock on keep their detected position
+        sizes = detections.bboxes[:, 2:] - detections.bboxes[:, :2]
+        trackable = (sizes >= 4).all(axis=1)
+        self._tracked_detections = detections[trackable]
+        self._static_detections = detections[~trackable]
+        
+        for x1, y1, x2, y2 in self._tracked_detections.bboxes.tolist():
+            self._trackers.add(cv2.legacy.TrackerMOSSE_create(), frame, (x1, y1, x2 - x1, y2 - y1))
+    
+    def _track(self, frame):
+        """
+        Propagate the last detections to a new frame with the trackers
+        
+        A target MOSSE loses keeps its last box; the next full pass is at
+        most `detect_interval` frames away.
+        """
+        _, boxes = self._trackers.update(frame)
+        self._frames_since_detection += 1
+        
+        h, w = frame.shape[:2]
+        boxes = np.asarray(boxes, dtype=np.float64).reshape(-1, 4)
+        boxes[:, 2:] += boxes[:, :2]  # x, y, w, h -> x1, y1, x2, y2
+        bboxes = boxes.astype(np.int32)
+        np.clip(bboxes[:, 0::2], 0, w, out=bboxes[:, 0::2])
+        np.clip(bboxes[:, 1::2], 0, h, out=bboxes[:, 1::2])
+        
+        tracked = self._tracked_detections
+        areas = (bboxes[:, 2] - bboxes[:, 0]) * (bboxes[:, 3] - bboxes[:, 1])
+        moved = Detections(
+            bboxes,
+            tracked.classes,
+            tracked.confs,
+            (areas / (w * h) * 100).astype(np.float32),
+            tracked.rider_mask
+        )
+        
+        return Detections.concat([moved, self._static_detections])
+    
+    def _detect_frames(self, frames):
+        """
+        Detections for a run of consecutive frames
+        
+        Each frame either reuses the cached detections (static scene), moves
+        them with the trackers, or gets a full DNN pass (every
+        `detect_interval` frames). Frames needing a DNN pass are batched
+        together.
+        """
+        # Plan every frame first so the DNN passes can share one batch
+        needs_detection = [self._should_detect(f) for f in frames]
+        plan = []
+        tracked = self._frames_since_detection
+        can_track = self.detect_interval > 1 and self._trackers is not None
+        for needed in needs_detection:
+            if not needed:
+                plan.append('reuse')
+            elif can_track and tracked < self.detect_interval - 1:
+                plan.append('track')
+                tracked += 1
+            else:
+                plan.append('detect')
+                tracked = 0
+                can_track = self.detect_interval > 1
+        
+        to_detect = [f for f, step in zip(frames, plan) if step == 'detect']
+        if len(to_detect) > 1:
+            fresh = iter(self.detect_batch(to_detect))
+        else:
+            fresh = iter([self.detect_frame(f) for f in to_detect])
+        
+        batch_detections = []
+        for frame, step in zip(frames, plan):
+            if step == 'reuse':
+                batch_detections.append(self._last_detections)
+                continue
+            
+            if step == 'track':
+                detections = self._track(frame)
+            else:
+                detections = next(fresh)
+                if self.detect_interval > 1:
+                    self._start_tracking(frame, detections)
+            
+            self._last_detections = detections
+            self._last_detection_time = time.time()
+            batch_detections.append(detections)
+        
+        return batch_detections
+    
+    def _postprocess(self, outputs, h, w, offset=(0, 0), frame_size=None):
+        """
+        Decode raw YOLO outputs for one frame and apply rider detection
+        
+        h, w is the size of the image that was fed to the network; for a
+        cropped window, offset is its top-left corner and frame_size the
+        (h, w) of the full frame the boxes are mapped back to.
+        
+        Returns: Detections
+        """
+        # Decode all raw YOLO rows at once: [cx, cy, w, h, obj, 80 class scores]
+        # OpenCV's region layer already scales class scores by objectness,
+        # so a score can never exceed its row's objectness: gate on that first
+        arr = np.vstack(outputs)
+        arr = arr[arr[:, 4] >= self.confidence_threshold]
+        
+        # Argmax over every class (a row won by car/truck is not a weak
+        # motorcycle), then keep only person, bicycle, and motorcycle
+        cls_scores = arr[:, 5:]
+        class_ids = cls_scores.argmax(axis=1)
+        confidences = cls_scores[np.arange(len(arr)), class_ids]
+        
+        keep = (confidences >= self.confidence_threshold) & np.isin(class_ids, self._target_class_ids)
+        arr = arr[keep]
+        class_ids = class_ids[keep]
+        confidences = confidences[keep]
+        
+        # Get coordinates (only for the survivors)
+        cx = (arr[:, 0] * w).astype(np.int32) + offset[0]
+        cy = (arr[:, 1] * h).astype(np.int32) + offset[1]
+        half_w = (arr[:, 2] * w).astype(np.int32) // 2
+        half_h = (arr[:, 3] * h).astype(np.int32) // 2
+        
+        if frame_size is not None:
+            h, w = frame_size
+        x1 = np.maximum(0, cx - half_w)
+        y1 = np.maximum(0, cy - half_h)
+        x2 = np.minimum(w, cx + half_w)
+        y2 = np.minimum(h, cy + half_h)
+        
+        # Calculate object size (for distance estimation)
+        frame_area = w * h
+        size_ratios = ((x2 - x1) * (y2 - y1) / frame_area) * 100  # As percentage
+        
+        # For long-distance mode: be more lenient with small objects
+        # (< 1% of frame) by reducing the threshold for distant objects
+        if self.long_distance_mode:
+            adjusted_threshold = self.confidence_threshold * 0.8
+            keep = ~((size_ratios < 1.0) & (confidences < adjusted_threshold))
+            x1, y1, x2, y2 = x1[keep], y1[keep], x2[keep], y2[keep]
+            class_ids = class_ids[keep]
+            confidences = confidences[keep]
+            size_ratios = size_ratios[keep]
+        
+        bboxes = np.stack([x1, y1, x2, y2], axis=1).astype(np.int32)
+        classes = class_ids.astype(np.uint8)
+        confidences = confidences.astype(np.float32)
+        size_ratios = size_ratios.astype(np.float32)  # Track object size for distance estimation
+        
+        # Treat both bicycles and motorcycles as bikes
+        is_person = classes == CLASS_PERSON
+        person_rows = np.flatnonzero(is_person)
+        bike_rows = np.flatnonzero(~is_person)
         
         # ===== INSTANT RIDER DETECTION =====
-        rider_detections = []
-        person_indices_as_riders = set()
+        rider_bikes = rider_persons = np.empty(0, dtype=np.intp)
+        is_rider = np.zeros(len(person_rows), dtype=bool)
         
-        for bike_idx, bike in enumerate(bikes):
-            for person_idx, person in enumerate(persons):
-                iou = self.calculate_iou(bike['bbox'], person['bbox'])
-                
-                # INSTANT: IoU > 0.25 = rider detected immediately
-                if iou > 0.25:
-                    person_indices_as_riders.add(person_idx)
-                    rider_det = {
-                        'class': 'Person on Bike',
-                        'confidence': max(bike['confidence'], person['confidence']),
-                        'bbox': bike['bbox'],
-                        'is_rider': True
-                    }
-                    rider_detections.append(rider_det)
-        
-        # Keep only standalone persons
-        standalone_persons = [
-            p for idx, p in enumerate(persons)
-            if idx not in person_indices_as_riders
-        ]
+        if len(bike_rows) and len(person_rows):
+            # All bike x person IoUs in one broadcast
+            bike_boxes = bboxes[bike_rows].astype(np.float32)
+            person_boxes = bboxes[person_rows].astype(np.float32)
+            if njit is not None:
+                iou = _pairwise_iou(bike_boxes, person_boxes)
+            else:
+                iou = self.calculate_iou_matrix(bike_boxes, person_boxes)
+            
+            # INSTANT: IoU > 0.25 = rider detected immediately
+            bike_idx, person_idx = np.nonzero(iou > 0.25)
+            rider_bikes = bike_rows[bike_idx]
+            rider_persons = person_rows[person_idx]
+            is_rider[person_idx] = True
         
-        final_detections = standalone_persons + bikes + rider_detections
-        return final_detections
+        # Standalone persons, then bikes, then riders (the bike's box)
+        rows = np.concatenate([person_rows[~is_rider], bike_rows, rider_bikes])
+        confs = confidences[rows]
+        confs[len(rows) - len(rider_bikes):] = np.maximum(
+            confidences[rider_bikes], confidences[rider_persons]
+        )
+        rider_mask = np.zeros(len(rows), dtype=bool)
+        rider_mask[len(rows) - len(rider_bikes):] = True
+        
+        return Detections(bboxes[rows], classes[rows], confs, size_ratios[rows], rider_mask)
     
     @staticmethod
     def calculate_iou(box1, box2):
         """Calculate Intersection over Union"""
-        x1_min, y1_min, x1_max, y1_max = box1
-        x2_min, y2_min, x2_max, y2_max = box2
-        
-        x_inter_min = max(x1_min, x2_min)
-        x_inter_max = min(x1_max, x2_max)
-        y_inter_min = max(y1_min, y2_min)
-        y_inter_max = min(y1_max, y2_max)
-        
-        if x_inter_max < x_inter_min or y_inter_max < y_inter_min:
-            return 0.0
+        return float(_iou_scalar(*box1, *box2))
+    
+    @staticmethod
+    def calculate_iou_matrix(boxes_a, boxes_b):
+        """Calculate IoU for every pair of boxes: (N,4) x (M,4) -> (N,M)"""
+        x_a = np.maximum(boxes_a[:, None, 0], boxes_b[None, :, 0])
+        y_a = np.maximum(boxes_a[:, None, 1], boxes_b[None, :, 1])
+        x_b = np.minimum(boxes_a[:, None, 2], boxes_b[None, :, 2])
+        y_b = np.minimum(boxes_a[:, None, 3], boxes_b[None, :, 3])
         
-        intersection = (x_inter_max - x_inter_min) * (y_inter_max - y_inter_min)
-        box1_area = (x1_max - x1_min) * (y1_max - y1_min)
-        box2_area = (x2_max - x2_min) * (y2_max - y2_min)
-        union = box1_area + box2_area - intersection
+        intersection = np.clip(x_b - x_a, 0, None) * np.clip(y_b - y_a, 0, None)
+        area_a = (boxes_a[:, 2] - boxes_a[:, 0]) * (boxes_a[:, 3] - boxes_a[:, 1])
+        area_b = (boxes_b[:, 2] - boxes_b[:, 0]) * (boxes_b[:, 3] - boxes_b[:, 1])
+        union = area_a[:, None] + area_b[None, :] - intersection
         
-        return intersection / union if union > 0 else 0.0
+        return np.divide(intersection, union, out=np.zeros_like(intersection), where=union > 0)
     
     @staticmethod
     def estimate_distance(size_ratio):
@@ -244,57 +737,70 @@ class YOLOv3Detector:
         else:
             return 'far'
     
+    @staticmethod
+    def _connected_components(adjacency):
+        """
+        Label connected components of a boolean adjacency matrix
+        
+        Each node repeatedly takes the smallest label among its neighbours
+        until nothing changes; nodes sharing a label are connected.
+        
+        Returns: (N,) array of component labels
+        """
+        n = len(adjacency)
+        labels = np.arange(n)
+        while True:
+            neighbour_min = np.where(adjacency, labels[None, :], n).min(axis=1)
+            new_labels = np.minimum(labels, neighbour_min)
+            if np.array_equal(new_labels, labels):
+                return labels
+            labels = new_labels
+    
     def detect_crowds(self, persons):
         """
         Detect crowds: groups of 5+ people in close proximity
+        
+        Args:
+            persons: Detections of standalone persons
+        
         Returns crowd regions with person count
         """
         if len(persons) < 5:
             return []
         
-        crowds = []
-        used_indices = set()
+        boxes = persons.bboxes
+        confidences = persons.confs
         
-        for i, person_i in enumerate(persons):
-            if i in used_indices:
-                continue
-            
-            crowd_group = [i]
-            used_indices.add(i)
-            x1_i, y1_i, x2_i, y2_i = person_i['bbox']
-            
-            # Find nearby persons (within 200px)
-            for j, person_j in enumerate(persons):
-                if j <= i or j in used_indices:
-                    continue
-                
-                x1_j, y1_j, x2_j, y2_j = person_j['bbox']
-                
-                # Calculate distance between bbox centers
-                center_i = ((x1_i + x2_i) / 2, (y1_i + y2_i) / 2)
-                center_j = ((x1_j + x2_j) / 2, (y1_j + y2_j) / 2)
-                distance = ((center_i[0] - center_j[0])**2 + (center_i[1] - center_j[1])**2)**0.5
-                
-                if distance < 200:  # Proximity threshold
-                    crowd_group.append(j)
-                    used_indices.add(j)
-            
-            # If group has 5+ people, it's a crowd
-            if len(crowd_group) >= 5:
-                # Get bounding box of entire crowd
-                all_x1 = [persons[idx]['bbox'][0] for idx in crowd_group]
-                all_y1 = [persons[idx]['bbox'][1] for idx in crowd_group]
-                all_x2 = [persons[idx]['bbox'][2] for idx in crowd_group]
-                all_y2 = [persons[idx]['bbox'][3] for idx in crowd_group]
-                
-                crowd = {
-                    'class': 'Crowd',
-                    'person_count': len(crowd_group),
-                    'bbox': [min(all_x1), min(all_y1), max(all_x2), max(all_y2)],
-                    'person_indices': crowd_group,
-                    'confidence': sum(persons[idx]['confidence'] for idx in crowd_group) / len(crowd_group)
-                }
-                crowds.append(crowd)
+        # Pairwise squared distances between bbox centers, all at once
+        centers = ((boxes[:, :2] + boxes[:, 2:]) / 2).astype(np.float32)
+        if njit is not None:
+            dist2 = _pairwise_dist2(centers)
+        else:
+            dist2 = ((centers[:, None, :] - centers[None, :, :]) ** 2).sum(axis=-1)
+        
+        # Persons within 200px are linked; linked persons form one group
+        labels = self._connected_components(dist2 < 200 ** 2)
+        
+        # Sort persons by group so each group is a contiguous run, then reduce
+        # every run at once (per-group bbox extrema and confidence sums in C)
+        order = np.argsort(labels, kind='stable')
+        _, starts, counts = np.unique(labels[order], return_index=True, return_counts=True)
+        group_x1y1 = np.minimum.reduceat(boxes[order, :2], starts)
+        group_x2y2 = np.maximum.reduceat(boxes[order, 2:], starts)
+        group_conf = np.add.reduceat(confidences[order], starts) / counts
+        members = np.split(order, starts[1:])
+        
+        # If group has 5+ people, it's a crowd
+        crowds = []
+        for g in np.flatnonzero(counts >= 5):
+            crowd = {
+                'class': 'Crowd',
+                'person_count': int(counts[g]),
+                'bbox': group_x1y1[g].tolist() + group_x2y2[g].tolist(),
+                'person_indices': members[g].tolist(),
+                'confidence': float(group_conf[g])
+            }
+            crowds.append(crowd)
         
         return crowds
     
@@ -308,10 +814,10 @@ class YOLOv3Detector:
             x1, y1, x2, y2 = crowd['bbox']
             person_count = crowd['person_count']
             
-            # Draw semi-transparent crowd region
-            overlay = frame.copy()
-            cv2.rectangle(overlay, (x1, y1), (x2, y2), (0, 165, 255), -1)
-            cv2.addWeighted(overlay, 0.15, frame, 0.85, 0, frame)
+            # Draw semi-transparent crowd region (blend only the crowd ROI in place)
+            roi = frame[y1:y2 + 1, x1:x2 + 1]
+            if roi.size:
+                cv2.addWeighted(np.full_like(roi, (0, 165, 255)), 0.15, roi, 0.85, 0, dst=roi)
             
             # Draw crowd border in orange
             cv2.rectangle(frame, (x1, y1), (x2, y2), (0, 165, 255), 3)
@@ -337,35 +843,27 @@ class YOLOv3Detector:
             )
         
         # Draw individual detections
-        for det in detections:
-            x1, y1, x2, y2 = det['bbox']
-            class_name = det['class']
-            confidence = det['confidence']
-            size_ratio = det.get('size_ratio', 1.0)
+        for (x1, y1, x2, y2), class_id, confidence, size_ratio, is_rider in zip(
+            detections.bboxes.tolist(), detections.classes.tolist(), detections.confs.tolist(),
+            detections.size_ratios.tolist(), detections.rider_mask.tolist()
+        ):
             distance = self.estimate_distance(size_ratio)
             
-            # Add distance indicator to label
-            distance_emoji = {'near': '🔴', 'medium': '🟡', 'far': '🟢'}.get(distance, '⚪')
-            
-            if class_name == 'Person on Bike':
+            if is_rider:
+                class_name = 'Person on Bike'
                 color = self.class_colors['rider']
-                label = f"BIKE (RIDER) {distance_emoji} {confidence:.2f}"
-            elif class_name == 'bicycle':
-                color = self.class_colors['bicycle']
-                label = f"BICYCLE {distance_emoji} {confidence:.2f}"
-            elif class_name == 'motorcycle':
-                color = self.class_colors['motorcycle']
-                label = f"BIKE (MOTO) {distance_emoji} {confidence:.2f}"
             else:
-                color = self.class_colors['person']
-                label = f"Person {distance_emoji} {confidence:.2f}"
+                class_name = self.classes[class_id]
+                color = self.class_colors[class_name]
+            prefix = self.LABEL_PREFIXES.get(class_name, 'Person')
+            label = f"{prefix} {confidence:.2f}"
             
             # Draw bounding box (thicker for far objects to improve visibility)
             thickness = 3 if distance == 'far' else 2
             cv2.rectangle(frame, (x1, y1), (x2, y2), color, thickness)
             
-            # Draw label background
-            text_size = cv2.getTextSize(label, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)[0]
+            # Draw label background (size looked up, not measured per frame)
+            text_size = self._text_sizes[prefix]
             cv2.rectangle(
                 frame,
                 (x1, y1 - text_size[1] - 10),
@@ -384,11 +882,138 @@ class YOLOv3Detector:
                 (255, 255, 255),
                 2
             )
+            
+            # Distance indicator dot
+            dot_color = self.DISTANCE_COLORS.get(distance, (255, 255, 255))
+            cv2.circle(frame, (x1 - 8, y1 - 8), 6, dot_color, -1)
         
         return frame
     
+    def _capture_loop(self, cap, frame_queue, stop_event):
+        """Capture thread: read frames into a bounded queue (None = camera failed)"""
+        while not stop_event.is_set():
+            ret, frame = cap.read()
+            item = frame if ret else None
+            
+            # Bounded queue: block (briefly) instead of piling up stale frames
+            while not stop_event.is_set():
+                try:
+                    frame_queue.put(item, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
+            
+            if not ret:
+                break
+    
+    def _render_loop(self, draw_queue, stop_event, quit_event, errors):
+        """
+        Render thread: draw results, show the frame, poll the keyboard
+        
+        An exception is stored in errors and stops the main loop through
+        quit_event (nothing would read draw_queue or the keyboard otherwise).
+        """
+        while not stop_event.is_set():
+            try:
+                item = draw_queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            
+            try:
+                if self._render(*item):
+                    quit_event.set()
+            except Exception as e:
+                errors.append(e)
+                quit_event.set()
+                return
+    
+    def _render(self, frame, detections, crowds, detection_time, frame_count, fps):
+        """
+        Draw detections + stats overlay and display the frame
+        
+        Returns: True if the user requested exit
+        """
+        # Draw detections and crowds
+        frame = self.draw_detections(frame, detections, crowds)
+        
+        # Display performance stats
+        stats_text = f"FPS: {fps:.1f} | Detection: {detection_time:.1f}ms | Frames: {frame_count}"
+        cv2.putText(
+            frame,
+            stats_text,
+            (10, 30),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (0, 255, 0),
+            2
+        )
+        
+        # Display detection counts
+        classes = detections.classes
+        is_rider = detections.rider_mask
+        riders = int(is_rider.sum())
+        total_persons = int((classes == CLASS_PERSON).sum())
+        total_bikes = int(((classes != CLASS_PERSON) & ~is_rider).sum())
+        crowd_count = len(crowds)
+        crowd_person_count = sum(c['person_count'] for c in crowds)
+        
+        count_text = f"Persons: {total_persons} | Bikes: {total_bikes} | Riders: {riders} | Crowds: {crowd_count} (Persons: {crowd_person_count})"
+        cv2.putText(
+            frame,
+            count_text,
+            (10, 70),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.7,
+            (0, 255, 0),
+            2
+        )
+        
+        # Display mode
+        mode_text = "Mode: INSTANT + LONG-DISTANCE DETECTION" if self.long_distance_mode else "Mode: INSTANT"
+        cv2.putText(
+            frame,
+            mode_text,
+            (10, 110),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.6,
+            (0, 165, 255),
+            2
+        )
+        
+        # Display distance legend
+        legend_text = "Distance dot: Red=Near Yellow=Medium Green=Far"
+        cv2.putText(
+            frame,
+            legend_text,
+            (10, 140),
+            cv2.FONT_HERSHEY_SIMPLEX,
+            0.5,
+            (200, 200, 200),
+            1
+        )
+        
+        # Show frame
+        cv2.imshow('Smart Traffic - Bike Rider Detection (INSTANT)', frame)
+        
+        # Non-blocking key check
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('q') or key == ord('Q') or key == 27:  # Q or ESC
+            print("\n[*] User requested exit")
+            return True
+        
+        return False
+    
     def run(self, source=0):
-        """Main detection loop - frame-by-frame, zero delay"""
+        """
+        Main detection loop - frame-by-frame, zero delay
+        
+        Pipelined across threads so camera decode, DNN inference and GUI
+        drawing overlap (OpenCV releases the GIL inside cap.read/forward):
+            capture thread -> frame queue -> main (detect) -> draw queue -> render thread
+        The draw queue holds a single frame and the main loop never waits on
+        it: if the GUI is still busy, the new frame is dropped from display.
+        On macOS the GUI must stay on the main thread, so rendering runs inline.
+        """
         print("[*] Opening webcam...")
         cap = cv2.VideoCapture(source)
         
@@ -406,109 +1031,111 @@ class YOLOv3Detector:
         
         # Set camera properties (non-blocking)
         try:
+            # MJPG before size/fps: far less USB bandwidth than the default
+            # YUYV and usually hardware-decoded
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))
             cap.set(cv2.CAP_PROP_FRAME_WIDTH, 640)
             cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 480)
             cap.set(cv2.CAP_PROP_FPS, 30)
             cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Minimize buffer
+            
+            fourcc = int(cap.get(cv2.CAP_PROP_FOURCC))
+            fourcc_text = "".join(chr((fourcc >> (8 * i)) & 0xFF) for i in range(4))
+            print(f"[*] Camera format: {fourcc_text}")
         except:
             pass  # Ignore if setting fails
         
         frame_count = 0
         start_time = time.time()
         
+        # Reset motion gating and tracking for this stream
+        self._prev_gray = None
+        self._last_detections = None
+        self._trackers = None
+        self._frames_since_detection = 0
+        
+        # Bounded queues keep only a few frames in flight per stage
+        frame_queue = queue.Queue(maxsize=max(2, self.batch_size))
+        draw_queue = queue.Queue(maxsize=1)
+        dropped_frames = 0
+        stop_event = threading.Event()  # shuts the worker threads down
+        quit_event = threading.Event()  # Q/ESC pressed in the window
+        render_errors = []  # set by the render thread if it dies
+        render_inline = sys.platform == 'darwin'
+        
+        threads = [threading.Thread(target=self._capture_loop, args=(cap, frame_queue, stop_event), daemon=True)]
+        if not render_inline:
+            threads.append(threading.Thread(target=self._render_loop, args=(draw_queue, stop_event, quit_event, render_errors), daemon=True))
+        for thread in threads:
+            thread.start()
+        
         try:
-            while True:
-                ret, frame = cap.read()
+            while not quit_event.is_set():
+                try:
+                    frame = frame_queue.get(timeout=0.1)
+                except queue.Empty:
+                    continue
                 
-                if not ret:
+                if frame is None:
                     print("[✗] Failed to read frame")
                     break
                 
-                frame_count += 1
+                # Batch frames that are already waiting (never wait for more:
+                # if inference keeps up, batches stay at 1 and latency is unchanged)
+                frames = [frame]
+                capture_failed = False
+                while len(frames) < self.batch_size:
+                    try:
+                        extra = frame_queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if extra is None:
+                        capture_failed = True
+                        break
+                    frames.append(extra)
+                
                 detection_start = time.time()
                 
                 # ===== INSTANT DETECTION (Frame-by-frame) =====
-                detections = self.detect_frame(frame)
-                
-                # Extract persons for crowd detection
-                persons = [d for d in detections if d['class'] == 'person']
-                
-                # Detect crowds
-                crowds = self.detect_crowds(persons)
-                
-                detection_time = (time.time() - detection_start) * 1000  # ms
-                
-                # Draw detections and crowds
-                frame = self.draw_detections(frame, detections, crowds)
-                
-                # Calculate FPS
-                elapsed = time.time() - start_time
-                fps = frame_count / elapsed if elapsed > 0 else 0
+                # Static frames reuse the most recent detections (motion gating),
+                # frames between DNN passes are tracked
+                batch_detections = self._detect_frames(frames)
                 
-                # Display performance stats
-                stats_text = f"FPS: {fps:.1f} | Detection: {detection_time:.1f}ms | Frames: {frame_count}"
-                cv2.putText(
-                    frame,
-                    stats_text,
-                    (10, 30),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.7,
-                    (0, 255, 0),
-                    2
-                )
+                detection_time = (time.time() - detection_start) * 1000 / len(frames)  # ms per frame
                 
-                # Display detection counts
-                riders = sum(1 for d in detections if d['class'] == 'Person on Bike')
-                total_persons = sum(1 for d in detections if d['class'] == 'person')
-                motorcycles = sum(1 for d in detections if d['class'] == 'motorcycle')
-                bicycles = sum(1 for d in detections if d['class'] == 'bicycle')
-                total_bikes = motorcycles + bicycles
-                crowd_count = len(crowds)
-                crowd_person_count = sum(c['person_count'] for c in crowds)
-                
-                count_text = f"👤 Persons: {total_persons} | 🚴 Bikes: {total_bikes} | 🏍️ Riders: {riders} | 👥 Crowds: {crowd_count} (Persons: {crowd_person_count})"
-                cv2.putText(
-                    frame,
-                    count_text,
-                    (10, 70),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.7,
-                    (0, 255, 0),
-                    2
-                )
-                
-                # Display mode
-                mode_text = "Mode: INSTANT + LONG-DISTANCE DETECTION" if self.long_distance_mode else "Mode: INSTANT"
-                cv2.putText(
-                    frame,
-                    mode_text,
-                    (10, 110),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.6,
-                    (0, 165, 255),
-                    2
-                )
-                
-                # Display distance legend
-                legend_text = "Distance: 🔴=Near 🟡=Medium 🟢=Far"
-                cv2.putText(
-                    frame,
-                    legend_text,
-                    (10, 140),
-                    cv2.FONT_HERSHEY_SIMPLEX,
-                    0.5,
-                    (200, 200, 200),
-                    1
-                )
-                
-                # Show frame
-                cv2.imshow('Smart Traffic - Bike Rider Detection (INSTANT)', frame)
+                for frame, detections in zip(frames, batch_detections):
+                    frame_count += 1
+                    
+                    # Extract persons for crowd detection
+                    persons = detections[detections.classes == CLASS_PERSON]
+                    
+                    # Detect crowds
+                    crowds = self.detect_crowds(persons)
+                    
+                    # Calculate FPS
+                    elapsed = time.time() - start_time
+                    fps = frame_count / elapsed if elapsed > 0 else 0
+                    
+                    item = (frame, detections, crowds, detection_time, frame_count, fps)
+                    if render_inline:
+                        if self._render(*item):
+                            quit_event.set()
+                            break
+                        continue
+                    
+                    # Hand off to the render thread (drop if it is still busy)
+                    try:
+                        draw_queue.put_nowait(item)
+                    except queue.Full:
+                        dropped_frames += 1
                 
-                # Non-blocking key check
-                key = cv2.waitKey(1) & 0xFF
-                if key == ord('q') or key == ord('Q') or key == 27:  # Q or ESC
-                    print("\n[*] User requested exit")
+                if capture_failed:
+                    print("[✗] Failed to read frame")
                     break
+            
+            # The render thread stopped on an error, not on Q/ESC
+            if render_errors:
+                raise render_errors[0]
         
         except KeyboardInterrupt:
             print("\n[*] Interrupted by user")
@@ -518,11 +1145,15 @@ class YOLOv3Detector:
         
         finally:
             print("[*] Cleaning up...")
+            stop_event.set()
+            for thread in threads:
+                thread.join(timeout=1.0)
             cap.release()
             cv2.destroyAllWindows()
             print(f"[✓] Total frames processed: {frame_count}")
             print(f"[✓] Average FPS: {frame_count / (time.time() - start_time):.1f}")
-
+            if dropped_frames:
+                print(f"[*] Frames skipped by display: {dropped_frames}")
 
 def main():
     """Main entry point"""
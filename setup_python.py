@@ -4,6 +4,30 @@ Setup script to install required Python packages for bike detection
 
 import subprocess
 import sys
+from pathlib import Path
+
+def build_native_decode():
+    """
+    Compile detect_core.pyx in place (optional)
+    
+    Needs a C compiler; without the extension bike_detection_onnx.py
+    uses its NumPy decode.
+    """
+    print("\n[*] Building native decode (detect_core.pyx)...")
+    try:
+        subprocess.check_call([
+            sys.executable, '-m', 'pip', 'install',
+            '--upgrade', 'cython', 'setuptools'
+        ])
+        subprocess.check_call(
+            [sys.executable, '-m', 'Cython.Build.Cythonize', '-i', '-3', 'detect_core.pyx'],
+            cwd=Path(__file__).resolve().parent
+        )
+        print("[✓] Native decode built")
+        return True
+    except subprocess.CalledProcessError as e:
+        print(f"[!] Native decode not built ({e}); the NumPy decode will be used")
+        return False
 
 def install_requirements():
     """Install all required Python packages"""
@@ -32,6 +56,8 @@ def install_requirements():
             print(f"[✗] Error installing {package}: {e}")
             return False
     
+    build_native_decode()
+    
     print("\n" + "=" * 60)
     print("[✓] All dependencies installed successfully!")
     print("=" * 60)
@@ -41,6 +67,11 @@ def install_requirements():
     print("  - First run will download YOLOv8n model (~50MB)")
     print("  - Subsequent runs will use cached model")
     print("  - Press 'Q' or 'ESC' to exit")
+    print("  - ONNX detector (bike_detection_onnx.py) needs: pip install onnxruntime")
+    print("    On Intel CPUs/iGPUs install onnxruntime-openvino instead; it replaces")
+    print("    onnxruntime (uninstall that first) and is picked up automatically")
+    print("    With py-cpuinfo and onnx installed, CPUs with AVX-512 FP16 use an")
+    print("    FP16 copy of the model")
     print("=" * 60)
     
     return True